@@ -6,21 +6,66 @@ Downloads and installs the latest Cursor AppImage for Linux
 
 import os
 import sys
+import functools
+import hashlib
+import stat
+import time
 import subprocess
 import requests
 import shutil
 import json
 from pathlib import Path
 import tempfile
-import re
 import pwd
 import platform
 import shlex
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import date
-
+from itertools import zip_longest
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson as _json_fast
+except ImportError:
+    _json_fast = None
+
+# One pooled session for every request so the API probe, the HEAD check and
+# the (ranged) AppImage download reuse TCP/TLS connections to the same hosts
+_session = requests.Session()
+_session.headers.update({'User-Agent': 'update-cursor/1.0', 'Accept-Encoding': 'identity'})
+# Pool sized for the parallel range workers; retry transient connection errors and 5xx
+_session.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+))
+
+# (connect, read) timeout for AppImage transfers, so a stalled CDN connection fails instead of hanging
+DOWNLOAD_TIMEOUT = (5, 60)
+
+@dataclass
+class Counters:
+    """Successful / failed operation counts, shared by every step of the update"""
+    ok: int = 0
+    fail: int = 0
+
+@functools.lru_cache(maxsize=1)
+def is_running_as_root():
+    """Return True when the script runs with root privileges (e.g. via sudo)."""
+    return os.geteuid() == 0
+
+@functools.lru_cache(maxsize=1)
+def get_sudo_user():
+    """Return the user who invoked sudo (SUDO_USER), or None."""
+    return os.environ.get('SUDO_USER')
+
+@functools.lru_cache(maxsize=1)
 def get_effective_user():
     """Return (username, home_path) for the user whose config should be updated."""
-    sudo_user = os.environ.get('SUDO_USER')
+    sudo_user = get_sudo_user()
     if sudo_user:
         try:
             info = pwd.getpwnam(sudo_user)
@@ -30,30 +75,83 @@ def get_effective_user():
     info = pwd.getpwuid(os.getuid())
     return info.pw_name, Path(info.pw_dir)
 
-def find_cursor_installation():
-    """Return the path to the cursor binary if installed, otherwise None."""
+@functools.lru_cache(maxsize=1)
+def get_known_paths():
+    """Return the filesystem locations this script inspects, keyed by name."""
     _, home_path = get_effective_user()
-    system_cursor = Path('/usr/local/bin/cursor')
-    user_cursor = home_path / '.local/bin/cursor'
-    if system_cursor.exists():
-        return system_cursor
-    if user_cursor.exists():
-        return user_cursor
+    return {
+        'system_cursor': Path('/usr/local/bin/cursor'),
+        'user_cursor': home_path / '.local/bin/cursor',
+        'user_version_file': home_path / '.local' / 'bin' / 'cursor_version.txt',
+        'primary_version_file': Path('/opt/update-cursor/config/version.txt'),
+        'system_etag_file': Path('/opt/update-cursor/config/etag.txt'),
+        'user_etag_file': home_path / '.local' / 'bin' / 'cursor_etag.txt',
+        'cwd_version_file': Path.cwd() / 'cursor_version.txt',
+        'desktop_file': home_path / '.local/share/applications/cursor.desktop',
+        'user_icon': home_path / '.local/share/icons/cursor/cursor.png',
+        'system_icon': Path('/usr/share/pixmaps/cursor.png'),
+    }
+
+def probe_paths():
+    """stat() every known path once; returns {name: os.stat_result or None}."""
+    probe = {}
+    for key, path in get_known_paths().items():
+        try:
+            probe[key] = os.stat(path)
+        except OSError:
+            probe[key] = None
+    return probe
+
+def find_cursor_installation(probe=None):
+    """Return the path to the cursor binary if installed, otherwise None."""
+    if probe is None:
+        probe = probe_paths()
+    paths = get_known_paths()
+    if probe['system_cursor'] is not None:
+        return paths['system_cursor']
+    if probe['user_cursor'] is not None:
+        return paths['user_cursor']
     return None
 
 def _should_write_as_user(username):
     """True when running as root via sudo and target is a regular user."""
-    return os.geteuid() == 0 and username and os.environ.get('SUDO_USER') == username
+    return is_running_as_root() and username and get_sudo_user() == username
+
+def atomic_write_text(file_path, content):
+    """Write content to a sibling .tmp file, fsync it and rename it over file_path.
+
+    Readers see either the old or the new file, never a truncated one, and the
+    new content is on disk before it becomes visible.
+    """
+    file_path = Path(file_path)
+    tmp_path = file_path.with_name(file_path.name + '.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 def write_text_as_user(file_path, content, username):
-    """Write a text file, using the target user's permissions when invoked via sudo."""
+    """Write a text file, using the target user's permissions when invoked via sudo.
+
+    The write is atomic: see atomic_write_text.
+    """
     file_path = Path(file_path)
+    tmp_path = file_path.with_name(file_path.name + '.tmp')
     if _should_write_as_user(username):
-        parent = shlex.quote(str(file_path.parent))
         target = shlex.quote(str(file_path))
-        run_command(f"sudo -u {username} mkdir -p {parent}", check=True)
+        tmp = shlex.quote(str(tmp_path))
+        run_command(['sudo', '-u', username, 'mkdir', '-p', str(file_path.parent)], check=True)
         result = subprocess.run(
-            ['sudo', '-u', username, 'bash', '-c', f'cat > {target}'],
+            ['sudo', '-u', username, 'bash', '-c', f'cat > {tmp} && sync {tmp} && mv -f {tmp} {target}'],
             input=content,
             text=True,
             capture_output=True,
@@ -63,7 +161,28 @@ def write_text_as_user(file_path, content, username):
             raise OSError(result.stderr.strip() or f"Failed to write {file_path} as {username}")
     else:
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        file_path.write_text(content)
+        atomic_write_text(file_path, content)
+
+def link_or_write_as_user(source_path, file_path, content, username):
+    """Hardlink file_path to source_path, falling back to writing content (e.g. across filesystems).
+
+    When writing on behalf of a sudo user the content is always written as
+    that user, so a root-owned inode never ends up in their home directory.
+    """
+    if _should_write_as_user(username):
+        write_text_as_user(file_path, content, username)
+        return
+    file_path = Path(file_path)
+    tmp_path = file_path.with_name(file_path.name + '.tmp')
+    try:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        os.link(source_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except OSError:
+        write_text_as_user(file_path, content, username)
 
 def write_bytes_as_user(file_path, data, username):
     """Write a binary file, using the target user's permissions when invoked via sudo."""
@@ -74,11 +193,8 @@ def write_bytes_as_user(file_path, data, username):
             tmp_path = tmp.name
         os.chmod(tmp_path, 0o644)
         try:
-            parent = shlex.quote(str(file_path.parent))
-            target = shlex.quote(str(file_path))
-            src = shlex.quote(tmp_path)
-            run_command(f"sudo -u {username} mkdir -p {parent}", check=True)
-            run_command(f"sudo -u {username} cp {src} {target}", check=True)
+            run_command(['sudo', '-u', username, 'mkdir', '-p', str(file_path.parent)], check=True)
+            run_command(['sudo', '-u', username, 'cp', tmp_path, str(file_path)], check=True)
         finally:
             os.unlink(tmp_path)
     else:
@@ -91,6 +207,8 @@ def print_help():
         "Usage: update-cursor [OPTIONS]\n\n"
         "Options:\n"
         "  --no-progress-bar   Hide the download progress percentage output.\n"
+        "  --force             Check for updates even if Cursor was updated in the last 30 minutes\n"
+        "                      (same as setting FORCE_UPDATE=1).\n"
         "  -h, --help          Show this help message and exit.\n\n"
         "Description:\n"
         "  Downloads and installs the latest Cursor AppImage for Linux.\n"
@@ -110,11 +228,62 @@ def get_linux_platform():
     print(f"⚠️  Unknown architecture '{machine}', defaulting to x64")
     return 'linux-x64', 'x64'
 
+def get_cursor_api_url(linux_platform):
+    """Return the Cursor download API URL for a platform."""
+    return f"https://cursor.com/api/download?platform={linux_platform}&releaseTrack=latest"
+
+MANIFEST_TTL_SECONDS = 5 * 60
+
+def get_manifest_etag_file(version_file, linux_platform):
+    """Return the sidecar file (next to version_file) holding the Cursor API ETag for a platform."""
+    return version_file.with_name(f'manifest-{linux_platform}.etag')
+
+def save_manifest_etag(version_file, linux_platform, etag):
+    """Remember the Cursor API ETag that version_file was last refreshed from."""
+    if not etag:
+        return
+    etag_file = get_manifest_etag_file(version_file, linux_platform)
+    try:
+        if etag_file.read_text().strip() == etag:
+            return
+    except OSError:
+        pass
+    try:
+        # data/ is owned by the invoking user already, so no sudo round trip is needed
+        atomic_write_text(etag_file, etag)
+    except Exception as e:
+        print(f"⚠️  Warning: Could not cache Cursor API ETag: {e}")
+
+def version_history_is_fresh(version_file, linux_platform):
+    """True if version_file was refreshed within the TTL or the Cursor API reports no change."""
+    try:
+        age = time.time() - version_file.stat().st_mtime
+    except OSError:
+        return False
+    if age < MANIFEST_TTL_SECONDS:
+        return True
+
+    try:
+        etag = get_manifest_etag_file(version_file, linux_platform).read_text().strip()
+    except OSError:
+        return False
+    if not etag:
+        return False
+    try:
+        response = _session.head(get_cursor_api_url(linux_platform), headers=conditional_headers(etag),
+                                 allow_redirects=True, timeout=10)
+    except requests.RequestException:
+        return False
+    return response.status_code == 304
+
 def fetch_latest_from_cursor_api(linux_platform):
-    """Fetch the latest Cursor download URL directly from the Cursor API."""
-    api_url = f"https://cursor.com/api/download?platform={linux_platform}&releaseTrack=latest"
+    """Fetch the latest Cursor download URL directly from the Cursor API.
+
+    Returns (download_url, version, etag).
+    """
+    api_url = get_cursor_api_url(linux_platform)
     print(f"🌐 Fetching latest version from Cursor API ({linux_platform})...")
-    response = requests.get(
+    response = _session.get(
         api_url,
         headers={'User-Agent': 'Cursor-Version-Checker', 'Cache-Control': 'no-cache'},
         timeout=30,
@@ -125,15 +294,30 @@ def fetch_latest_from_cursor_api(linux_platform):
     version = data.get('version')
     if not download_url or not version:
         raise ValueError("Cursor API response missing downloadUrl or version")
-    return download_url, version
+    return download_url, version, response.headers.get('ETag')
+
+def probe_latest_version_via_http(linux_platform):
+    """Cheap in-process check of the latest version; returns (version, url, etag) or (None, None, None)."""
+    try:
+        download_url, version, etag = fetch_latest_from_cursor_api(linux_platform)
+        return version, download_url, etag
+    except Exception as e:
+        print(f"⚠️  Version probe failed, falling back to the version history: {e}")
+        return None, None, None
+
+def load_json_file(path):
+    """Load a JSON file, using orjson when it is installed"""
+    if _json_fast is not None:
+        return _json_fast.loads(Path(path).read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
 
 def save_version_history_entry(version_file, version_string, download_url, linux_platform):
-    """Persist a version entry fetched via API fallback."""
+    """Persist a version entry fetched from the Cursor API."""
     history = {"versions": []}
     if version_file.exists():
         try:
-            with open(version_file, 'r') as f:
-                history = json.load(f)
+            history = load_json_file(version_file)
         except (json.JSONDecodeError, OSError):
             history = {"versions": []}
 
@@ -153,21 +337,393 @@ def save_version_history_entry(version_file, version_string, download_url, linux
     with open(version_file, 'w') as f:
         json.dump(history, f, indent=2)
 
-def run_command(cmd, check=True):
-    """Run a shell command and return the result"""
+def run_command(argv, check=True, cwd=None, stream_output=False):
+    """Run a command (argv list, no shell) and return the result
+
+    With stream_output=True the command writes straight to our terminal
+    instead of having its output captured.
+    """
     try:
-        result = subprocess.run(cmd, shell=True, check=check, capture_output=True, text=True)
+        if stream_output:
+            return subprocess.run(argv, check=check, stdin=subprocess.DEVNULL, cwd=cwd)
+        result = subprocess.run(argv, check=check, capture_output=True, text=True,
+                                stdin=subprocess.DEVNULL, cwd=cwd)
         return result
     except subprocess.CalledProcessError as e:
-        print(f"Error running command: {cmd}")
-        print(f"Error: {e.stderr}")
+        print(f"Error running command: {' '.join(argv)}")
+        if e.stderr:
+            print(f"Error: {e.stderr}")
         if check:
             sys.exit(1)
         return e
 
-def download_cursor_appimage(successful_checks=0, failed_checks=0, no_progress_bar=False):
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+RANGE_DOWNLOAD_WORKERS = 8
+RANGE_PART_SIZE = 8 * 1024 * 1024
+RANGE_DOWNLOAD_MIN_SIZE = 8 * 1024 * 1024
+
+class RangeNotSupported(Exception):
+    """Raised when the server answers a Range request with the full body."""
+
+class NotModified(Exception):
+    """Raised when the server reports (304) that the cached ETag is still current."""
+
+def get_install_path():
+    """Return the Cursor install path: system-wide with sudo, ~/.local/bin otherwise."""
+    return get_known_paths()[get_install_path_key()]
+
+def get_install_path_key():
+    """Return the get_known_paths() key of the install path for this run."""
+    return 'system_cursor' if is_running_as_root() else 'user_cursor'
+
+PROGRESS_INTERVAL = 0.1
+
+def make_progress_reporter(total_size, no_progress_bar=False):
+    """Return a thread-safe callback that accumulates bytes and prints the percentage.
+
+    The terminal is written at most every PROGRESS_INTERVAL seconds, plus once
+    at completion.
+    """
+    lock = threading.Lock()
+    state = {'downloaded': 0, 'next_print': 0.0}
+    inv_total = 100.0 / total_size if total_size > 0 else 0.0
+
+    def report(nbytes):
+        if no_progress_bar or total_size <= 0:
+            return
+        with lock:
+            state['downloaded'] += nbytes
+            now = time.monotonic()
+            if now >= state['next_print'] or state['downloaded'] >= total_size:
+                state['next_print'] = now + PROGRESS_INTERVAL
+                sys.stdout.write(f"\r📥 Downloading... {state['downloaded'] * inv_total:.1f}%")
+                sys.stdout.flush()
+
+    return report
+
+def conditional_headers(etag):
+    """Return request headers asking the server to skip the body if etag still matches."""
+    return {'If-None-Match': etag} if etag else {}
+
+def head_download(url, etag=None):
+    """HEAD url (conditionally on etag); returns the response, or None if the request failed."""
+    try:
+        response = _session.head(url, headers=conditional_headers(etag), allow_redirects=True, timeout=30)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+    return response
+
+def get_range_download_size(head_response):
+    """Return Content-Length if the HEAD response advertises byte ranges, otherwise None."""
+    if head_response is None:
+        return None
+    if head_response.headers.get('accept-ranges', '').lower() != 'bytes':
+        return None
+    total_size = int(head_response.headers.get('content-length', 0))
+    return total_size or None
+
+def preallocate(fd, size):
+    """Reserve size bytes for fd in one go so the file is laid out contiguously."""
+    if size <= 0 or not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except OSError:
+        # Not supported by this filesystem; the writes will allocate as they go
+        pass
+
+def pwrite_all(fd, data, offset):
+    """os.pwrite until every byte of data has been written at offset."""
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+def download_range(url, fd, start, end, total_size, report, abort, if_range=None):
+    """Fetch bytes start..end (inclusive) of url and write them at the same offset in fd.
+
+    if_range is the validator (ETag or Last-Modified) from the HEAD request; if
+    the file changed since then the server sends it whole, which is treated
+    like a server without range support.
+    """
+    if abort.is_set():
+        return
+    headers = {'Range': f'bytes={start}-{end}'}
+    if if_range:
+        headers['If-Range'] = if_range
+    with _session.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise RangeNotSupported(f"server returned {response.status_code} for a range request")
+        content_range = response.headers.get('content-range', '')
+        if content_range != f'bytes {start}-{end}/{total_size}':
+            raise RangeNotSupported(f"unexpected Content-Range {content_range!r} for bytes {start}-{end}")
+        offset = start
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            if abort.is_set():
+                return
+            if chunk:
+                pwrite_all(fd, chunk, offset)
+                offset += len(chunk)
+                report(len(chunk))
+    if offset != end + 1:
+        raise requests.RequestException(f"short read for range {start}-{end}")
+
+def download_ranges(url, fd, total_size, no_progress_bar=False, if_range=None):
+    """Download url with parallel Range requests into fd; False if ranges are unsupported.
+
+    url should be the final URL the HEAD request was redirected to, so the
+    parts don't resolve the redirect again.
+    """
+    os.ftruncate(fd, total_size)
+    preallocate(fd, total_size)
+    report = make_progress_reporter(total_size, no_progress_bar)
+    abort = threading.Event()
+    # Fixed-size parts handed out to a small pool, so one slow connection
+    # only holds up its current part instead of a whole 1/N of the file
+    ranges = [(start, min(start + RANGE_PART_SIZE, total_size) - 1)
+              for start in range(0, total_size, RANGE_PART_SIZE)]
+
+    with ThreadPoolExecutor(max_workers=min(RANGE_DOWNLOAD_WORKERS, len(ranges))) as pool:
+        futures = [pool.submit(download_range, url, fd, start, end, total_size, report, abort, if_range)
+                   for start, end in ranges]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except RangeNotSupported:
+            abort.set()
+            for future in futures:
+                future.cancel()
+            return False
+        except BaseException:
+            abort.set()
+            for future in futures:
+                future.cancel()
+            raise
+    return True
+
+def download_single_stream(url, fd, no_progress_bar=False, etag=None, hasher=None):
+    """Download url over a single connection into fd; returns the response ETag.
+
+    When a hashlib object is given, every chunk is fed to it as it is written.
+    """
+    headers = conditional_headers(etag)
+    with open(fd, 'wb', closefd=False) as out_file, \
+            _session.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        response.raise_for_status()
+        if response.status_code == 304:
+            raise NotModified(url)
+        response.raw.decode_content = True
+
+        total_size = int(response.headers.get('content-length', 0))
+        preallocate(fd, total_size)
+
+        if hasher is None and (no_progress_bar or total_size <= 0):
+            # Nothing to report per chunk, so let the C copy loop move the body
+            shutil.copyfileobj(response.raw, out_file, COPY_BUFFER_SIZE)
+        else:
+            report = make_progress_reporter(total_size, no_progress_bar)
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if chunk:
+                    out_file.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    report(len(chunk))
+        # Drop any preallocated tail if the body was shorter than announced
+        out_file.flush()
+        os.ftruncate(fd, out_file.tell())
+        return response.headers.get('ETag')
+
+def hash_file_range(fd, size, hasher):
+    """Feed the first size bytes of fd to hasher."""
+    offset = 0
+    while offset < size:
+        chunk = os.pread(fd, min(DOWNLOAD_CHUNK_SIZE, size - offset), offset)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        offset += len(chunk)
+
+def download_to_path(url, dest_path, no_progress_bar=False, etag=None, expected_sha256=None):
+    """Download url into dest_path, using parallel ranges when the server allows it.
+
+    Returns the server ETag (or None). Raises NotModified when etag is given
+    and the server copy has not changed, and ValueError when expected_sha256
+    is given and does not match. The partial file is removed on failure.
+    """
+    head_response = head_download(url, etag)
+    if head_response is not None and head_response.status_code == 304:
+        raise NotModified(url)
+
+    fd = os.open(dest_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o755)
+    hasher = hashlib.sha256() if expected_sha256 else None
+    try:
+        total_size = get_range_download_size(head_response)
+        new_etag = head_response.headers.get('ETag') if head_response is not None else None
+        done = False
+        if total_size and total_size >= RANGE_DOWNLOAD_MIN_SIZE:
+            if_range = head_response.headers.get('ETag') or head_response.headers.get('Last-Modified')
+            done = download_ranges(head_response.url, fd, total_size, no_progress_bar, if_range)
+            if not done:
+                print("⚠️  Server ignored range requests (or the file changed), falling back to a single download stream")
+                os.ftruncate(fd, 0)
+            elif hasher is not None:
+                # Ranges arrive out of order, so hash the file once it is complete
+                # (it is still in the page cache at this point)
+                hash_file_range(fd, total_size, hasher)
+        if not done:
+            new_etag = download_single_stream(url, fd, no_progress_bar, etag, hasher) or new_etag
+        if hasher is not None and hasher.hexdigest() != expected_sha256.lower():
+            raise ValueError(f"SHA-256 mismatch for {url}: expected {expected_sha256}, "
+                             f"got {hasher.hexdigest()}")
+        # Set the final mode on the open fd (os.open's mode is subject to the umask)
+        os.fchmod(fd, 0o755)
+        os.fsync(fd)
+        # The AppImage is not read back now; don't let it push other data out of the page cache
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except BaseException:
+        os.close(fd)
+        try:
+            os.unlink(dest_path)
+        except OSError:
+            pass
+        raise
+    os.close(fd)
+    return new_etag
+
+@functools.lru_cache(maxsize=1)
+def find_bun():
+    """Locate the Bun executable, preferring a per-user ~/.bun install; None if missing."""
+    # Get list of users with valid shells
+    login_shells = ('/bash', '/sh', '/zsh', '/fish', '/ksh', '/tcsh', '/csh')
+    users = sorted((u for u in pwd.getpwall() if u.pw_shell.endswith(login_shells)),
+                   key=lambda u: u.pw_name)
+
+    if users:
+        print(f"🔍 Checking for Bun in {len(users)} user(s)...")
+
+        # Check each user's home directory for bun
+        for user_info in users:
+            try:
+                potential_bun = Path(user_info.pw_dir) / '.bun' / 'bin' / 'bun'
+                if potential_bun.exists():
+                    print(f"✅ Found Bun at: {potential_bun} (user: {user_info.pw_name})")
+                    return str(potential_bun)
+            except PermissionError:
+                # We don't have permission to look in this home directory
+                continue
+
+    # If no user-specific Bun found, fallback to system PATH
+    bun_path = shutil.which("bun")
+    if bun_path is not None:
+        print(f"✅ Found Bun in system PATH: {bun_path}")
+    return bun_path
+
+def _is_newer_than(path, reference_path):
+    """True if path exists and is at least as new as reference_path."""
+    try:
+        return path.stat().st_mtime >= reference_path.stat().st_mtime
+    except OSError:
+        return False
+
+def get_fetcher_command(bun_path, script_dir, run_as):
+    """Return argv for the TypeScript fetcher, preferring a bytecode-compiled build.
+
+    updater/fetch_updates.bin is (re)built with 'bun build --compile --bytecode'
+    whenever it is missing or older than the .ts source; if the build fails
+    (e.g. updater/ is owned by root) the source is run through Bun directly,
+    and a marker in data/ stops the build being retried until the source changes.
+    """
+    ts_path = script_dir / 'updater' / 'fetch_updates.ts'
+    bin_path = script_dir / 'updater' / 'fetch_updates.bin'
+    failed_marker = script_dir / 'data' / 'fetch_updates.build-failed'
+    source_command = [bun_path, 'updater/fetch_updates.ts']
+
+    if _is_newer_than(bin_path, ts_path):
+        return [str(bin_path)]
+    if _is_newer_than(failed_marker, ts_path):
+        return source_command
+
+    print("🔨 Compiling TypeScript fetcher to bytecode...")
+    build = run_command(run_as + [bun_path, 'build', 'updater/fetch_updates.ts', '--compile',
+                                  '--bytecode', '--outfile', 'updater/fetch_updates.bin'],
+                        check=False, cwd=str(script_dir))
+    if build.returncode != 0:
+        print("⚠️  Could not compile fetcher, running the TypeScript source instead")
+        try:
+            failed_marker.touch()
+        except OSError:
+            pass
+        return source_command
+
+    try:
+        failed_marker.unlink()
+    except OSError:
+        pass
+    return [str(bin_path)]
+
+LINUX_PLATFORMS = ('linux-x64', 'linux-arm64')
+
+def fetch_version_history_py(version_file):
+    """Record the latest Linux download URLs in version_file.
+
+    In-process port of what updater/fetch_updates.ts does for Linux; the
+    README badge maintenance stays in the TypeScript script.
+    Returns True if at least one platform was updated.
+    """
+    updated = False
+    for linux_platform in LINUX_PLATFORMS:
+        try:
+            download_url, version_string, etag = fetch_latest_from_cursor_api(linux_platform)
+        except Exception as e:
+            print(f"⚠️  Could not fetch {linux_platform} download link: {e}")
+            continue
+        save_version_history_entry(version_file, version_string, download_url, linux_platform)
+        # Only now does the ETag describe what version_file holds
+        save_manifest_etag(version_file, linux_platform, etag)
+        updated = True
+    return updated
+
+def download_cursor_appimage(counters, no_progress_bar=False, probe=None, force=False):
     """Download the latest Cursor AppImage from local repository"""
     print("🔍 Checking for latest Cursor version...")
+    original_user = get_sudo_user()
+
+    linux_platform, arch_label = get_linux_platform()
+    print(f"🖥️  Detected architecture: {arch_label} ({linux_platform})")
+
+    # Fast path: if Cursor is installed and the API reports the same version,
+    # we are done without spawning Bun at all
+    if probe is None:
+        probe = probe_paths()
+    # The installed version is read once here and reused after the fetcher has run
+    installed = find_cursor_installation(probe) is not None
+    current_version = get_current_version(probe) if installed else None
+
+    # Within the TTL of the last install, trust the recorded version without any network traffic
+    if current_version and not force:
+        age = get_version_file_age(probe)
+        if age is not None and age < VERSION_CHECK_TTL_SECONDS:
+            print(f"✅ Cursor {current_version} was installed {int(age // 60)} minute(s) ago, skipping update check")
+            print("   Pass --force or set FORCE_UPDATE=1 to check anyway")
+            counters.ok += 1
+            return None, current_version, None
+
+    probed_version = None
+    if current_version:
+        probed_version, probed_url, probed_etag = probe_latest_version_via_http(linux_platform)
+        if probed_version and not compare_versions(current_version, probed_version):
+            print(f"✅ Cursor is already up to date (version {current_version})")
+            print("   No download needed")
+            counters.ok += 1
+            return None, probed_version, None
+
+    # Bun and the TypeScript fetcher are only used when explicitly requested
+    use_bun = os.environ.get('USE_BUN_FETCHER') == '1'
 
     # Check if TypeScript file exists
     # Try multiple approaches to find the script directory
@@ -198,53 +754,27 @@ def download_cursor_appimage(successful_checks=0, failed_checks=0, no_progress_b
             script_dir = potential_dir
             ts_file = potential_ts
 
-    if not ts_file or not ts_file.exists():
+    if not use_bun and not script_dir:
+        # The Python fetcher only needs a data/ directory; use the project root
+        script_dir = Path(__file__).resolve().parent.parent
+
+    if use_bun and (not ts_file or not ts_file.exists()):
         print(f"❌ TypeScript file not found: update-cursor-links.ts")
         print(f"   Checked directories:")
         if '__file__' in globals() and __file__:
             print(f"   - {Path(__file__).parent.absolute()}")
         print(f"   - {Path.cwd()}")
         print(f"   - /opt/update-cursor")
-        failed_checks += 1
-        return None, "0.0.0", successful_checks, failed_checks
-
-    # Check if Bun is available (check user-specific installation first)
-    # Get list of users with valid shells
-    users_result = run_command("grep -E '/(bash|sh|zsh|fish|ksh|tcsh|csh)$' /etc/passwd | cut -d: -f1 | sort", check=False)
-    bun_path = None
-    user_home = None
+        counters.fail += 1
+        return None, "0.0.0", None
 
-    if users_result.returncode == 0 and users_result.stdout:
-        users = [user.strip() for user in users_result.stdout.strip().split('\n') if user.strip()]
-        print(f"🔍 Checking for Bun in {len(users)} user(s)...")
-
-        # Check each user's home directory for bun
-        for username in users:
-            try:
-                user_info = pwd.getpwnam(username)
-                home_dir = user_info.pw_dir
-                potential_bun = Path(home_dir) / '.bun' / 'bin' / 'bun'
-
-                if potential_bun.exists():
-                    bun_path = str(potential_bun)
-                    user_home = home_dir
-                    print(f"✅ Found Bun at: {bun_path} (user: {username})")
-                    break
-            except (KeyError, PermissionError) as e:
-                # User might not exist or we don't have permission
-                continue
-
-    # If no user-specific Bun found, fallback to system PATH
-    if not bun_path:
-        bun_check = run_command("which bun", check=False)
-        if bun_check.returncode != 0:
+    if use_bun:
+        bun_path = find_bun()
+        if bun_path is None:
             print("❌ Bun is not installed or not in PATH")
             print("   Please install Bun: curl -fsSL https://bun.sh/install | bash")
-            failed_checks += 1
-            return None, "0.0.0", successful_checks, failed_checks
-        else:
-            bun_path = "bun"  # Use system bun
-            print(f"✅ Found Bun in system PATH: {bun_path}")
+            counters.fail += 1
+            return None, "0.0.0", None
 
     # Ensure data directory exists before running TypeScript script
     data_dir = script_dir / "data"
@@ -255,102 +785,109 @@ def download_cursor_appimage(successful_checks=0, failed_checks=0, no_progress_b
             print("✅ Data directory created")
         except Exception as e:
             print(f"❌ Failed to create data directory: {e}")
-            failed_checks += 1
-            return None, "0.0.0", successful_checks, failed_checks
+            counters.fail += 1
+            return None, "0.0.0", None
 
     # When running with sudo, ensure the original user can write to data/
-    original_user = os.environ.get('SUDO_USER')
-    if original_user and os.geteuid() == 0:
-        run_command(f"chown -R {original_user} {data_dir}", check=False)
+    if original_user and is_running_as_root():
+        run_command(['chown', '-R', original_user, str(data_dir)], check=False)
 
-    linux_platform, arch_label = get_linux_platform()
-    print(f"🖥️  Detected architecture: {arch_label} ({linux_platform})")
-    if original_user:
-        # When running with sudo, execute as the original user
-        result = run_command(f"sudo -u {original_user} bash -c 'cd {script_dir} && {bun_path} updater/fetch_updates.ts'", check=False)
-    else:
-        # When running as normal user, execute directly
-        result = run_command(f"cd {script_dir} && {bun_path} updater/fetch_updates.ts", check=False)
+    # Define version file path (version-history.json created by the fetcher)
+    version_file = script_dir / "data" / "version-history.json"
 
-    if result.returncode == 0:
-        print("✅ Successfully updated cursor links.")
-        successful_checks += 1
+    recorded_probe = False
+    if probed_version:
+        # The probe already fetched the newer release for this platform; record it
+        # instead of asking the API again (other platforms' entries are never read here)
+        try:
+            save_version_history_entry(version_file, probed_version, probed_url, linux_platform)
+            save_manifest_etag(version_file, linux_platform, probed_etag)
+            recorded_probe = True
+        except OSError as e:
+            print(f"⚠️  Could not record the probed release: {e}")
+
+    if recorded_probe:
+        print("✅ Recorded the new release from the version probe, skipping refresh")
+        counters.ok += 1
+        if original_user and is_running_as_root():
+            run_command(['chown', '-R', original_user, str(data_dir)], check=False)
+    elif not probed_version and version_history_is_fresh(version_file, linux_platform):
+        # Nothing changed upstream since the last refresh; skip the fetcher entirely
+        print("✅ Version history is current, skipping refresh")
+        counters.ok += 1
+    elif not use_bun:
+        if fetch_version_history_py(version_file):
+            print("✅ Successfully updated cursor links.")
+            counters.ok += 1
+        else:
+            print("⚠️  Failed to update cursor links, will try API fallback if needed")
+            counters.fail += 1
+        if original_user and is_running_as_root():
+            run_command(['chown', '-R', original_user, str(data_dir)], check=False)
     else:
-        print(f"⚠️  Failed to update cursor links (exit code: {result.returncode}), will try API fallback if needed")
-        if hasattr(result, 'stderr') and result.stderr:
-            print(f"Error output: {result.stderr}")
-        if hasattr(result, 'stdout') and result.stdout:
-            print(f"Output: {result.stdout}")
-        failed_checks += 1
-
-    # Define version file path (version-history.json created by the TypeScript script)
-    version_file = script_dir / "data" / "version-history.json"
+        # When running with sudo, execute as the original user
+        run_as = ['sudo', '-u', original_user] if original_user else []
+        fetcher = get_fetcher_command(bun_path, script_dir, run_as)
+        result = run_command(run_as + fetcher, check=False, cwd=str(script_dir), stream_output=True)
+
+        if result.returncode == 0:
+            print("✅ Successfully updated cursor links.")
+            counters.ok += 1
+        else:
+            print(f"⚠️  Failed to update cursor links (exit code: {result.returncode}), will try API fallback if needed")
+            counters.fail += 1
 
     print("📖 Reading version history...")
 
     try:
         version_data = {"versions": []}
         if version_file.exists():
-            with open(version_file, 'r') as f:
-                version_data = json.load(f)
-            successful_checks += 1
+            version_data = load_json_file(version_file)
+            counters.ok += 1
         else:
             print(f"⚠️  Version file not found: {version_file}")
 
         # Find the latest version
-        latest_version = None
-        latest_version_info = None
-
-        for version_info in version_data.get('versions', []):
-            version = version_info.get('version')
-            if version:
-                # Parse version number for comparison
-                version_parts = [int(x) for x in version.split('.')]
-
-                if latest_version is None:
-                    latest_version = version_parts
-                    latest_version_info = version_info
-                else:
-                    # Compare version numbers
-                    if version_parts > latest_version:
-                        latest_version = version_parts
-                        latest_version_info = version_info
+        latest_version_info = max(
+            (v for v in version_data.get('versions', []) if v.get('version')),
+            key=lambda v: parse_version(v['version']),
+            default=None,
+        )
 
         # Fallback to Cursor API when version history is empty (first-time install)
         if not latest_version_info:
             print("⚠️  No valid versions in version history, trying Cursor API...")
             try:
-                download_url, version_string = fetch_latest_from_cursor_api(linux_platform)
+                download_url, version_string, manifest_etag = fetch_latest_from_cursor_api(linux_platform)
                 save_version_history_entry(version_file, version_string, download_url, linux_platform)
+                save_manifest_etag(version_file, linux_platform, manifest_etag)
                 latest_version_info = {
                     'version': version_string,
                     'platforms': {linux_platform: download_url},
                 }
-                latest_version = [int(x) for x in version_string.split('.')]
                 print(f"✅ Latest version from API: {version_string}")
-                successful_checks += 1
+                counters.ok += 1
             except Exception as e:
                 print(f"❌ No valid versions found in version history and API fallback failed: {e}")
-                failed_checks += 1
+                counters.fail += 1
                 sys.exit(1)
 
-        version_string = '.'.join(map(str, latest_version))
+        version_string = latest_version_info['version']
         print(f"✅ Latest version found: {version_string}")
-        successful_checks += 1
+        counters.ok += 1
 
         # Check if we need to download (compare with current version)
-        if not find_cursor_installation():
+        if not installed:
             print("📝 Cursor is not installed, downloading latest version...")
-            successful_checks += 1
+            counters.ok += 1
         else:
-            current_version = get_current_version()
             if not compare_versions(current_version, version_string):
                 print(f"✅ Cursor is already up to date (version {current_version})")
                 print("   No download needed")
-                successful_checks += 1
-                return None, version_string, successful_checks, failed_checks
+                counters.ok += 1
+                return None, version_string, None
             print("📥 Cursor is not up to date, downloading latest version...")
-            successful_checks += 1
+            counters.ok += 1
         # Get the AppImage URL for the detected architecture
         platforms = latest_version_info.get('platforms', {})
         appimage_url = platforms.get(linux_platform)
@@ -358,135 +895,132 @@ def download_cursor_appimage(successful_checks=0, failed_checks=0, no_progress_b
         if not appimage_url:
             print(f"⚠️  {linux_platform} AppImage not found in version history, trying Cursor API...")
             try:
-                appimage_url, api_version = fetch_latest_from_cursor_api(linux_platform)
+                appimage_url, api_version, manifest_etag = fetch_latest_from_cursor_api(linux_platform)
                 version_string = api_version
                 save_version_history_entry(version_file, version_string, appimage_url, linux_platform)
-                successful_checks += 1
+                save_manifest_etag(version_file, linux_platform, manifest_etag)
+                counters.ok += 1
             except Exception as e:
                 print(f"❌ {linux_platform} AppImage not found and API fallback failed: {e}")
-                failed_checks += 1
+                counters.fail += 1
                 sys.exit(1)
 
         print(f"📦 Downloading Cursor {version_string} ({arch_label})")
-        successful_checks += 1
+        counters.ok += 1
 
-        # Download the AppImage
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.AppImage') as temp_file:
-            response = requests.get(appimage_url, stream=True)
-            response.raise_for_status()
+        # Download the AppImage straight into the install directory so the
+        # final install step is a same-filesystem rename rather than a copy
+        install_path = get_install_path()
+        partial_path = install_path.with_name(install_path.name + '.partial')
+        install_path.parent.mkdir(parents=True, exist_ok=True)
 
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    temp_file.write(chunk)
-                    downloaded += len(chunk)
-                    if not no_progress_bar and total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        print(f"\r📥 Downloading... {percent:.1f}%", end='', flush=True)
-
-            print(f"\n✅ Download completed: {temp_file.name}")
-            successful_checks += 1
-            return temp_file.name, version_string, successful_checks, failed_checks
+        # Only ask for a conditional download when the binary the ETag describes is still there
+        saved_etag = read_saved_etag() if probe[get_install_path_key()] is not None else None
+        try:
+            etag = download_to_path(appimage_url, partial_path, no_progress_bar=no_progress_bar,
+                                    etag=saved_etag, expected_sha256=latest_version_info.get('sha256'))
+        except NotModified:
+            print("✅ Installed AppImage already matches the server copy, skipping download")
+            counters.ok += 1
+            update_version_file(version_string, counters, etag=saved_etag)
+            return None, version_string, None
+
+        print(f"\n✅ Download completed: {partial_path}")
+        counters.ok += 1
+        return str(partial_path), version_string, etag
 
     except json.JSONDecodeError as e:
         print(f"❌ Error parsing version history JSON: {e}")
-        failed_checks += 1
+        counters.fail += 1
         sys.exit(1)
     except requests.RequestException as e:
         print(f"❌ Error downloading Cursor: {e}")
-        failed_checks += 1
+        counters.fail += 1
         sys.exit(1)
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-        failed_checks += 1
+        counters.fail += 1
         sys.exit(1)
 
-def make_executable(file_path, successful_checks=0, failed_checks=0):
-    """Make the AppImage executable"""
-    print(f"🔧 Making {file_path} executable...")
-    try:
-        os.chmod(file_path, 0o755)
-        print("✅ File is now executable")
-        successful_checks += 1
-    except Exception as e:
-        print(f"❌ Failed to make file executable: {e}")
-        failed_checks += 1
-    return successful_checks, failed_checks
-
-def install_cursor(appimage_path, successful_checks=0, failed_checks=0):
+def install_cursor(appimage_path, counters):
     """Install Cursor to appropriate location based on sudo usage"""
     # Check if running with sudo
-    is_sudo = os.geteuid() == 0
+    is_sudo = is_running_as_root()
+    install_path = get_install_path()
 
     if is_sudo:
-        install_path = '/usr/local/bin/cursor'
         print("📦 Installing Cursor to /usr/local/bin/cursor...")
 
         try:
-            # Create directory if it doesn't exist
-            os.makedirs('/usr/local/bin', exist_ok=True)
-
-            # Move AppImage to /usr/local/bin/cursor
-            shutil.move(appimage_path, install_path)
-            successful_checks, failed_checks = make_executable(install_path, successful_checks, failed_checks)
+            # The AppImage was downloaded next to its final location and is
+            # already 0755 (set on the fd), so it is executable once renamed
+            os.replace(appimage_path, install_path)
 
             print("✅ Cursor installed successfully to system location")
-            successful_checks += 1
+            counters.ok += 1
         except Exception as e:
             print(f"❌ Failed to install Cursor: {e}")
-            failed_checks += 1
+            counters.fail += 1
     else:
         # Install to user's local bin directory
-        home_path = Path.home()
-        local_bin = home_path / '.local' / 'bin'
-        install_path = local_bin / 'cursor'
+        local_bin = install_path.parent
 
         print(f"📦 Installing Cursor to {install_path}...")
 
         try:
-            # Create directory if it doesn't exist
-            local_bin.mkdir(parents=True, exist_ok=True)
-
-            # Move AppImage to user's local bin
-            shutil.move(appimage_path, install_path)
-            successful_checks, failed_checks = make_executable(str(install_path), successful_checks, failed_checks)
+            # The AppImage was downloaded next to its final location and is
+            # already 0755 (set on the fd), so it is executable once renamed
+            os.replace(appimage_path, install_path)
 
             print("✅ Cursor installed successfully to user location")
             print(f"   You can run it with: {install_path}")
             print(f"   Or add {local_bin} to your PATH to run 'cursor --no-sandbox' from anywhere")
-            successful_checks += 1
+            counters.ok += 1
         except Exception as e:
             print(f"❌ Failed to install Cursor: {e}")
-            failed_checks += 1
-
-    return successful_checks, failed_checks
+            counters.fail += 1
+
+def replace_desktop_entry_line(content, key, new_line):
+    """Replace every line starting with 'key=' by new_line, appending it if there is none."""
+    prefix = f"{key}="
+    new_lines = []
+    found = False
+    for line in content.splitlines(keepends=True):
+        if line.startswith(prefix):
+            new_lines.append(new_line + ('\n' if line.endswith('\n') else ''))
+            found = True
+        else:
+            new_lines.append(line)
+    if not found:
+        new_lines.append(f"\n{new_line}\n")
+    return ''.join(new_lines)
 
 CURSOR_ICON_URL = "https://cursor.com/marketing-static/icon-512x512.png"
 
-def download_cursor_icon(home_path, username):
+def download_cursor_icon(username, probe=None):
     """
     Download Cursor icon only if missing; save to:
     - User: ~/.local/share/icons/cursor/cursor.png (for normal user run)
     - System: /usr/share/pixmaps/cursor.png (when running with sudo, for system-wide)
     Returns the path to the user icon for use in the desktop file, or None on failure.
     """
-    user_icon_dir = home_path / ".local/share/icons/cursor"
-    user_icon_path = user_icon_dir / "cursor.png"
-    system_icon_path = Path("/usr/share/pixmaps/cursor.png")
+    if probe is None:
+        probe = probe_paths()
+    paths = get_known_paths()
+    user_icon_path = paths['user_icon']
+    system_icon_path = paths['system_icon']
 
-    user_needs = not user_icon_path.exists()
-    system_needs = os.geteuid() == 0 and not system_icon_path.exists()
+    user_needs = probe['user_icon'] is None
+    system_needs = is_running_as_root() and probe['system_icon'] is None
 
     if not user_needs and not system_needs:
         return str(user_icon_path)
 
-    if user_icon_path.exists():
+    if not user_needs:
         data = user_icon_path.read_bytes()
     else:
         try:
-            resp = requests.get(CURSOR_ICON_URL, timeout=30)
+            resp = _session.get(CURSOR_ICON_URL, timeout=30)
             resp.raise_for_status()
             data = resp.content
         except Exception as e:
@@ -510,37 +1044,32 @@ def download_cursor_icon(home_path, username):
 
     return str(user_icon_path)
 
-def update_desktop_file(successful_checks=0, failed_checks=0):
+def update_desktop_file(counters, probe=None):
     """Update the desktop file with correct Exec path"""
-    username, home_path = get_effective_user()
-    desktop_file = home_path / '.local/share/applications/cursor.desktop'
+    if probe is None:
+        probe = probe_paths()
+    username, _ = get_effective_user()
+    paths = get_known_paths()
+    desktop_file = paths['desktop_file']
 
     # Download icon for user (~/.local/share/icons/cursor/cursor.png) and optionally system (/usr/share/pixmaps)
-    icon_path = download_cursor_icon(home_path, username)
+    icon_path = download_cursor_icon(username, probe)
     icon_value = icon_path if icon_path else "cursor"
 
     # Determine the correct exec path based on actual installation locations
     # Check which installation exists and prioritize accordingly
-    system_cursor = Path('/usr/local/bin/cursor')
-    user_cursor = home_path / '.local/bin/cursor'
-
-    # Determine exec path based on installation priority
     exec_path = None
-    if system_cursor.exists():
+    if probe['system_cursor'] is not None:
         # System-wide installation exists, use it
-        exec_path = "/usr/local/bin/cursor"
+        exec_path = str(paths['system_cursor'])
         print(f"📱 Desktop file will point to system-wide installation: {exec_path}")
-    elif user_cursor.exists():
+    elif probe['user_cursor'] is not None:
         # User installation exists, use it
-        exec_path = str(user_cursor)
+        exec_path = str(paths['user_cursor'])
         print(f"📱 Desktop file will point to user installation: {exec_path}")
     else:
         # No installation found, fall back to sudo-based logic
-        is_sudo = os.geteuid() == 0
-        if is_sudo:
-            exec_path = "/usr/local/bin/cursor"
-        else:
-            exec_path = str(home_path / '.local' / 'bin' / 'cursor')
+        exec_path = str(get_install_path())
         print(f"📱 No existing installation found, using default path: {exec_path}")
 
     desktop_content = f"""[Desktop Entry]
@@ -555,71 +1084,66 @@ Categories=Development;TextEditor;
 StartupWMClass=cursor
 """
 
-    if not desktop_file.exists():
+    if probe['desktop_file'] is None:
         print("⚠️  Desktop file not found, creating one...")
         try:
             write_text_as_user(desktop_file, desktop_content, username)
             print("✅ Desktop file created")
-            successful_checks += 1
+            counters.ok += 1
         except Exception as e:
             print(f"❌ Failed to create desktop file: {e}")
-            failed_checks += 1
+            counters.fail += 1
     else:
         print("📝 Updating existing desktop file...")
         try:
             try:
-                content = desktop_file.read_text()
+                original_content = desktop_file.read_text()
+                content = original_content
             except PermissionError:
                 if _should_write_as_user(username):
+                    original_content = None
                     content = desktop_content
                 else:
                     raise
 
             new_exec_line = f"Exec={exec_path} %U --no-sandbox"
-            pattern = r'Exec=.*'
-            if re.search(pattern, content):
-                content = re.sub(pattern, new_exec_line, content)
-            else:
-                content += f"\n{new_exec_line}\n"
+            content = replace_desktop_entry_line(content, 'Exec', new_exec_line)
+            content = replace_desktop_entry_line(content, 'Icon', f"Icon={icon_value}")
 
-            icon_pattern = r'Icon=.*'
-            if re.search(icon_pattern, content):
-                content = re.sub(icon_pattern, f'Icon={icon_value}', content)
+            if content == original_content:
+                print("✅ Desktop file already up to date")
             else:
-                content += f"\nIcon={icon_value}\n"
-
-            write_text_as_user(desktop_file, content, username)
-            print("✅ Desktop file updated")
-            successful_checks += 1
+                write_text_as_user(desktop_file, content, username)
+                print("✅ Desktop file updated")
+            counters.ok += 1
         except PermissionError:
             print("❌ Failed to update desktop file: permission denied")
             print("   If you previously ran with sudo, try running: sudo update-cursor")
-            failed_checks += 1
+            counters.fail += 1
         except Exception as e:
             print(f"❌ Failed to update desktop file: {e}")
-            failed_checks += 1
+            counters.fail += 1
 
-    return successful_checks, failed_checks
-
-def check_installation_conflicts():
+def check_installation_conflicts(probe=None):
     """Check for potential conflicts between different installation types"""
-    _, home_path = get_effective_user()
+    if probe is None:
+        probe = probe_paths()
 
-    system_cursor = Path('/usr/local/bin/cursor')
-    user_cursor = home_path / '.local/bin/cursor'
+    system_cursor = probe['system_cursor'] is not None
+    user_cursor = probe['user_cursor'] is not None
 
     conflicts = []
 
     # Check if both installations exist
-    if system_cursor.exists() and user_cursor.exists():
+    if system_cursor and user_cursor:
         conflicts.append("Both system-wide and user-specific installations found")
 
     # Check if running with sudo but user installation exists
-    if os.geteuid() == 0 and user_cursor.exists():
+    if is_running_as_root() and user_cursor:
         conflicts.append("Running with sudo but user-specific installation exists")
 
     # Check if running without sudo but system installation exists
-    if os.geteuid() != 0 and system_cursor.exists():
+    if not is_running_as_root() and system_cursor:
         conflicts.append("Running without sudo but system-wide installation exists")
 
     if conflicts:
@@ -632,24 +1156,33 @@ def check_installation_conflicts():
 
     return False
 
-def get_current_version():
+# Version files in lookup order; the one next to the installed binary wins
+VERSION_FILE_KEYS = ('user_version_file', 'primary_version_file', 'cwd_version_file')
+
+VERSION_CHECK_TTL_SECONDS = 30 * 60
+
+def get_version_file_age(probe):
+    """Seconds since the version file get_current_version would read was written, or None."""
+    for key in VERSION_FILE_KEYS:
+        st = probe[key]
+        if st is not None and stat.S_ISREG(st.st_mode):
+            return time.time() - st.st_mtime
+    return None
+
+def get_current_version(probe=None):
     """Get the installed Cursor version, only if the binary is present."""
-    install_path = find_cursor_installation()
+    if probe is None:
+        probe = probe_paths()
+    install_path = find_cursor_installation(probe)
     if not install_path:
         return None
 
-    _, home_path = get_effective_user()
+    paths = get_known_paths()
     print(f"🔍 Found Cursor installation: {install_path}")
 
-    # Prefer version file next to the installed binary
-    version_files = [
-        home_path / '.local' / 'bin' / 'cursor_version.txt',
-        Path("/opt/update-cursor/config/version.txt"),
-        Path.cwd() / 'cursor_version.txt',
-    ]
-
-    for vf in version_files:
-        if vf.exists():
+    for key in VERSION_FILE_KEYS:
+        vf = paths[key]
+        if probe[key] is not None and stat.S_ISREG(probe[key].st_mode):
             try:
                 current_version = vf.read_text().strip()
                 print(f"📖 Current installed version: {current_version}")
@@ -660,61 +1193,108 @@ def get_current_version():
     print("📝 No version file found, will download latest version")
     return None
 
+_parsed_versions = {}
+
+def parse_version(version):
+    """Parse a dotted version string into a tuple of ints, memoized per string"""
+    parts = _parsed_versions.get(version)
+    if parts is None:
+        parts = tuple(int(x) for x in version.split('.'))
+        _parsed_versions[version] = parts
+    return parts
+
 def compare_versions(current_version, latest_version):
     """Compare two version strings and return True if latest is greater"""
     if not current_version:
         return True  # If no current version, always download
 
     try:
-        # Parse version numbers for comparison
-        current_parts = [int(x) for x in current_version.split('.')]
-        latest_parts = [int(x) for x in latest_version.split('.')]
-
-        # Pad with zeros to make them the same length
-        max_len = max(len(current_parts), len(latest_parts))
-        current_parts.extend([0] * (max_len - len(current_parts)))
-        latest_parts.extend([0] * (max_len - len(latest_parts)))
-
-        return latest_parts > current_parts
+        current_parts = parse_version(current_version)
+        latest_parts = parse_version(latest_version)
+
+        # Missing trailing components count as zero (1.2 == 1.2.0)
+        for current_part, latest_part in zip_longest(current_parts, latest_parts, fillvalue=0):
+            if latest_part != current_part:
+                return latest_part > current_part
+        return False
     except (ValueError, AttributeError) as e:
         print(f"⚠️  Warning: Could not compare versions: {e}")
         return True  # If comparison fails, download to be safe
 
-def update_version_file(version, successful_checks=0, failed_checks=0):
-    """Update version number in cursor_version.txt file"""
+def get_etag_file():
+    """Return the file holding the ETag of the AppImage at the current install path.
+
+    The ETag is stored per install location, next to that location's version
+    file, so a system install's ETag never vouches for a user install.
+    """
+    if get_install_path_key() == 'system_cursor':
+        return get_known_paths()['system_etag_file']
+    return get_known_paths()['user_etag_file']
+
+def read_saved_etag():
+    """Return the ETag of the installed AppImage download, or None if unknown."""
+    try:
+        return get_etag_file().read_text().strip() or None
+    except OSError:
+        return None
+
+def save_etag(etag):
+    """Persist (or clear, when etag is None) the ETag of the installed AppImage."""
+    etag_file = get_etag_file()
+    try:
+        if etag:
+            etag_file.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(etag_file, etag)
+        else:
+            etag_file.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"⚠️  Warning: Could not update ETag file: {e}")
+
+def update_version_file(version, counters, etag=None):
+    """Update version number in cursor_version.txt file (and the download ETag)"""
     print(f"📝 Updating version file with version: {version}")
 
-    username, home_path = get_effective_user()
+    username, _ = get_effective_user()
+    paths = get_known_paths()
 
     # Primary version file location: /opt/update-cursor
-    primary_version_file = Path("/opt/update-cursor/config/version.txt")
+    primary_version_file = paths['primary_version_file']
+    primary_written = False
 
     try:
         # Create the directory if it doesn't exist
         primary_version_file.parent.mkdir(parents=True, exist_ok=True)
 
         # Write the version to the primary file
-        primary_version_file.write_text(version)
+        atomic_write_text(primary_version_file, version)
         print(f"✅ Version file updated: {primary_version_file}")
-        successful_checks += 1
+        counters.ok += 1
+        primary_written = True
 
     except Exception as e:
         print(f"⚠️  Warning: Could not update primary version file: {e}")
-        failed_checks += 1
+        counters.fail += 1
 
     # Also update version file in user's .local/bin for backward compatibility
-    user_version_file = home_path / '.local' / 'bin' / 'cursor_version.txt'
+    user_version_file = paths['user_version_file']
 
     try:
-        write_text_as_user(user_version_file, version, username)
+        if primary_written:
+            # Same content as the primary file: hardlink it instead of writing it twice
+            link_or_write_as_user(primary_version_file, user_version_file, version, username)
+        else:
+            write_text_as_user(user_version_file, version, username)
         print(f"✅ User version file updated: {user_version_file}")
-        successful_checks += 1
+        counters.ok += 1
 
     except Exception as e:
         print(f"⚠️  Warning: Could not update user version file: {e}")
-        failed_checks += 1
+        counters.fail += 1
 
-    return successful_checks, failed_checks
+    # The ETag belongs to the binary at this run's install path, not to the version files
+    save_etag(etag)
 
 def cleanup_temp_file(file_path):
     """Clean up temporary file"""
@@ -724,6 +1304,14 @@ def cleanup_temp_file(file_path):
     except OSError:
         pass
 
+def print_summary(counters):
+    """Print the success/failure counters"""
+    total = counters.ok + counters.fail
+    print(f"\n📊 Summary:")
+    print(f"   ✅ Successful operations: {counters.ok}")
+    print(f"   ❌ Failed operations: {counters.fail}")
+    print(f"   📈 Success rate: {(counters.ok / total * 100):.1f}%" if total > 0 else "   📈 Success rate: N/A")
+
 def main():
     """Main function"""
     print("🚀 Cursor Update Script")
@@ -735,47 +1323,45 @@ def main():
         print_help()
         return
     no_progress_bar = ('--no-progress-bar' in args) or ('no-progress-bar' in args)
+    force = ('--force' in args) or os.environ.get('FORCE_UPDATE') == '1'
 
     # Initialize counters
-    successful_checks = 0
-    failed_checks = 0
+    counters = Counters()
 
     # Check if running as root for system-wide installation
-    if os.geteuid() != 0:
+    if not is_running_as_root():
         print("ℹ️  Running without sudo - Cursor will be installed to ~/.local/bin/")
         print("   For system-wide installation, run with sudo\n")
 
     # Check for installation conflicts
-    check_installation_conflicts()
+    probe = probe_paths()
+    check_installation_conflicts(probe)
 
     try:
         # Step 1: Download Cursor AppImage (if needed)
-        result = download_cursor_appimage(successful_checks, failed_checks, no_progress_bar=no_progress_bar)
-        if len(result) == 4:
-            appimage_path, version, successful_checks, failed_checks = result
-        else:
-            appimage_path, version = result
+        appimage_path, version, etag = download_cursor_appimage(
+            counters, no_progress_bar=no_progress_bar, probe=probe, force=force)
 
         if appimage_path is None:
             # No download needed or prerequisites missing
             if version == "0.0.0":
                 print("\n❌ Cannot proceed due to missing prerequisites.")
-                print("   Please install Bun and try again.")
-            elif not find_cursor_installation():
+                print("   See the messages above; unset USE_BUN_FETCHER to use the built-in fetcher.")
+            elif not find_cursor_installation(probe):
                 print("\n❌ Cursor is not installed.")
                 print("   Re-run the script to download and install Cursor.")
             else:
                 print("\n🎉 Cursor is already up to date!")
                 print("   You can launch Cursor from your applications menu or run 'cursor' from terminal")
         else:
-            # Step 2: Make it executable
-            successful_checks, failed_checks = make_executable(appimage_path, successful_checks, failed_checks)
+            # Step 2: Install to /usr/local/bin/cursor
+            install_cursor(appimage_path, counters)
 
-            # Step 3: Install to /usr/local/bin/cursor
-            successful_checks, failed_checks = install_cursor(appimage_path, successful_checks, failed_checks)
+            # Step 3: Update version number in cursor_version.txt file
+            update_version_file(str(version), counters, etag=etag)
 
-            # Step 4: Update version number in cursor_version.txt file
-            successful_checks, failed_checks = update_version_file(str(version), successful_checks, failed_checks)
+            # The install changed what is on disk; refresh the probe for later steps
+            probe = probe_paths()
 
             print("✅ Updated Cursor successfully!")
             print("\n🎉 Cursor update completed successfully!")
@@ -783,28 +1369,19 @@ def main():
 
         # Always ensure desktop file and icon (even when no Cursor update was needed)
         if version != "0.0.0":
-            successful_checks, failed_checks = update_desktop_file(successful_checks, failed_checks)
+            update_desktop_file(counters, probe)
 
         # Display final counters
-        print(f"\n📊 Summary:")
-        print(f"   ✅ Successful operations: {successful_checks}")
-        print(f"   ❌ Failed operations: {failed_checks}")
-        print(f"   📈 Success rate: {(successful_checks / (successful_checks + failed_checks) * 100):.1f}%" if (successful_checks + failed_checks) > 0 else "   📈 Success rate: N/A")
+        print_summary(counters)
 
     except KeyboardInterrupt:
         print("\n❌ Update cancelled by user")
-        print(f"\n📊 Summary:")
-        print(f"   ✅ Successful operations: {successful_checks}")
-        print(f"   ❌ Failed operations: {failed_checks}")
-        print(f"   📈 Success rate: {(successful_checks / (successful_checks + failed_checks) * 100):.1f}%" if (successful_checks + failed_checks) > 0 else "   📈 Success rate: N/A")
+        print_summary(counters)
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ An error occurred: {e}")
-        failed_checks += 1
-        print(f"\n📊 Summary:")
-        print(f"   ✅ Successful operations: {successful_checks}")
-        print(f"   ❌ Failed operations: {failed_checks}")
-        print(f"   📈 Success rate: {(successful_checks / (successful_checks + failed_checks) * 100):.1f}%" if (successful_checks + failed_checks) > 0 else "   📈 Success rate: N/A")
+        counters.fail += 1
+        print_summary(counters)
         sys.exit(1)
 
 if __name__ == "__main__":